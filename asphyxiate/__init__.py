@@ -1,12 +1,13 @@
+import copy
 import docutils.parsers.rst
 import docutils.statemachine
+import hashlib
 import logging
 import os
 import sphinx.errors
 import sys
-from lxml import etree
+import time
 import docutils.nodes
-import sphinx.domains.c
 
 
 log = logging.getLogger(__name__)
@@ -23,6 +24,132 @@ class AsphyxiateError(sphinx.errors.SphinxError):
     category = 'Asphyxiate error'
 
 
+class BudgetExceeded(Exception):
+    """A ``doxygenfile`` directive ran over one of its limits."""
+
+
+class XMLBudgetExceeded(BudgetExceeded):
+    """Like BudgetExceeded, but no more compound xml may be loaded."""
+
+
+class Budget(object):
+    """Resource limits for one ``doxygenfile``; None means no limit."""
+
+    def __init__(self, time_limit=None, member_limit=None, xml_limit=None):
+        self.time_limit = time_limit
+        self.member_limit = member_limit
+        self.xml_limit = xml_limit
+        self.start = time.time()
+        self.members = 0
+        self.xml_bytes = 0
+
+    def check_time(self):
+        if self.time_limit is None:
+            return
+        elapsed = time.time() - self.start
+        if elapsed > self.time_limit:
+            raise BudgetExceeded(
+                'time limit of {limit}s exceeded'.format(
+                    limit=self.time_limit,
+                    ))
+
+    def charge_member(self):
+        self.members += 1
+        if self.member_limit is not None and self.members > self.member_limit:
+            raise BudgetExceeded(
+                'member limit of {limit} exceeded'.format(
+                    limit=self.member_limit,
+                    ))
+        self.check_time()
+
+    def charge_xml(self, size):
+        self.xml_bytes += size
+        if self.xml_limit is not None and self.xml_bytes > self.xml_limit:
+            raise XMLBudgetExceeded(
+                'xml limit of {limit} bytes exceeded'.format(
+                    limit=self.xml_limit,
+                    ))
+        self.check_time()
+
+
+def c_domain():
+    """Return the Sphinx C domain."""
+    # imported on first use, like lxml
+    import sphinx.domains.c
+    return sphinx.domains.c.CDomain
+
+
+_logging_ready = False
+
+
+def init_logging(env):
+    """Set up logging on first use, at ``asphyxiate_log_level``."""
+    global _logging_ready
+    if _logging_ready:
+        return
+    _logging_ready = True
+
+    # sphinx isn't helpful for extensions wanting to log, so bypass it and
+    # go straight to stderr
+    log.propagate = False
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter(fmt='%(name)s:%(levelname)s: %(message)s'),
+        )
+    log.addHandler(handler)
+    level = env.config.asphyxiate_log_level
+    if not isinstance(level, int):
+        # a name like 'debug'; getLevelName maps names to numbers too
+        level = logging.getLevelName(level.upper())
+    log.setLevel(level)
+
+
+# attributes doxygen rewrites on every run even when the documentation
+# itself did not change; these are left out of the content hash
+VOLATILE_ATTRIBUTES = {
+    'doxygen': ['version'],
+    'doxygenindex': ['version'],
+    'references': ['startline', 'endline'],
+    'referencedby': ['startline', 'endline'],
+    'location': [
+        'line',
+        'column',
+        'bodystart',
+        'bodyend',
+        'declline',
+        'declcolumn',
+        ],
+    }
+
+# doxygen inline markup; whitespace around these is a word break, not
+# just formatting of the xml
+INLINE_TAGS = [
+    'bold',
+    'emphasis',
+    'computeroutput',
+    'ulink',
+    'ref',
+    ]
+
+# C domain object types for the members listed in doxygen index.xml
+INDEX_OBJTYPES = {
+    'struct': 'type',
+    'function': 'function',
+    'define': 'macro',
+    'typedef': 'type',
+    'variable': 'member',
+    }
+
+# content hashes of compound xml files, keyed by path; values are
+# (stat, hash) and stay valid for as long as the file on disk is
+# untouched
+_digest_cache = {}
+
+# parsed compound xml files, keyed by path; values are (stat, tree).
+# Only kept while documents are being read, see drop_trees.
+_tree_cache = {}
+
+
 def listify(g):
     """Decorator that gathers generator results and returns a list."""
     def _listify(*args, **kwargs):
@@ -37,11 +164,108 @@ def listify(g):
     return _listify
 
 
+def _hash_node(h, node):
+    volatile = VOLATILE_ATTRIBUTES.get(node.tag, [])
+    h.update(node.tag.encode('utf-8'))
+    for k, v in sorted(node.attrib.items()):
+        if k in volatile:
+            continue
+        h.update(u'\0{k}={v}'.format(k=k, v=v).encode('utf-8'))
+    h.update(u'\0{text}'.format(text=node.text or '').encode('utf-8'))
+    for child in node:
+        _hash_node(h, child)
+    h.update(u'\0/{tail}'.format(tail=node.tail or '').encode('utf-8'))
+
+
+def content_hash(node):
+    """Hash a doxygen xml element, ignoring the volatile bits."""
+    h = hashlib.sha1()
+    _hash_node(h, node)
+    return h.hexdigest()
+
+
+def note_inventory(env, objects):
+    """Offer ``(name, objtype)`` pairs anchored here as C objects."""
+    if not hasattr(env, 'asphyxiate_inventory'):
+        env.asphyxiate_inventory = {}
+    env.asphyxiate_inventory.setdefault(env.docname, []).extend(objects)
+
+
+def note_compound(env, path, digest):
+    """Rebuild the current document when the compound content changes."""
+    if not hasattr(env, 'asphyxiate_compounds'):
+        env.asphyxiate_compounds = {}
+    env.asphyxiate_compounds.setdefault(env.docname, {})[path] = digest
+
+
+def find_file(index_xml, filename):
+    return index_xml.xpath(
+        "//compound[@kind='file' and name=$name]",
+        name=filename,
+        )
+
+
+def _found_digest(compounds):
+    # hashes what a lookup found, nothing at all included, so a header
+    # turning up in or vanishing from the index is noticed too
+    h = hashlib.sha1()
+    for node in compounds:
+        _hash_node(h, node)
+    return h.hexdigest()
+
+
+def note_lookup(env, path, digest, filename, compounds):
+    """Rebuild the current document when ``filename`` matches differently."""
+    if not hasattr(env, 'asphyxiate_lookups'):
+        env.asphyxiate_lookups = {}
+    env.asphyxiate_lookups.setdefault(env.docname, {})[(path, filename)] = (
+        digest,
+        _found_digest(compounds),
+        )
+
+
+def _stat(path):
+    st = os.stat(path)
+    return (st.st_mtime, st.st_size)
+
+
+def _parse_compound(path, key):
+    log.getChild('load_compound').debug('Parsing doxygen xml from %s', path)
+    from lxml import etree
+    tree = etree.parse(path)
+    digest = content_hash(tree.getroot())
+    _digest_cache[path] = (key, digest)
+    return (tree, digest)
+
+
+def compound_digest(path):
+    """Hash a compound xml file, returning ``(tree or None, hash)``."""
+    # the tree is only there if it had to be parsed, and is not kept
+    key = _stat(path)
+    cached = _digest_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return (None, cached[1])
+    return _parse_compound(path, key)
+
+
+def load_compound(path):
+    """Parse a doxygen compound xml file, returning ``(tree, hash)``."""
+    key = _stat(path)
+    cached = _tree_cache.get(path)
+    if cached is not None and cached[0] == key:
+        tree = cached[1]
+    else:
+        (tree, _) = _parse_compound(path, key)
+        _tree_cache[path] = (key, tree)
+    (_, digest) = _digest_cache[path]
+    return (tree, digest)
+
+
 def handle_function_params(node, directive):
     assert node.get('kind') in ['param'], \
         "cannot handle {node.tag} kind={node.attrib[kind]}".format(node=node)
 
-    doc_field_types = sphinx.domains.c.CDomain.directives['function'].doc_field_types
+    doc_field_types = c_domain().directives['function'].doc_field_types
     # i wish i could access the "typemap" directly, this lookup is fugly
     (field_type,) = [f for f in doc_field_types if f.name == 'parameter']
 
@@ -82,7 +306,7 @@ def handle_function_returnval(node, directive):
     assert node.get('kind') in ['return'], \
         "cannot handle {node.tag} kind={node.attrib[kind]}".format(node=node)
 
-    doc_field_types = sphinx.domains.c.CDomain.directives['function'].doc_field_types
+    doc_field_types = c_domain().directives['function'].doc_field_types
     # i wish i could access the "typemap" directly, this lookup is fugly
     (field_type,) = [f for f in doc_field_types if f.name == 'returnvalue']
 
@@ -110,12 +334,16 @@ def _render_memberdef_function(node, directive):
 
     # TODO render @static @const @explicit @inline @virt
 
+    # the tree is shared via the tree cache, and the parameter
+    # and return value lists get cut out of it below
+    node = copy.deepcopy(node)
+
     usage = '{type} {name}{argsstring}'.format(
         type=node.xpath("./type/text()")[0],
         name=node.xpath("./name/text()")[0],
         argsstring=node.xpath("./argsstring/text()")[0],
         )
-    directive = sphinx.domains.c.CDomain.directives['function'](
+    directive = c_domain().directives['function'](
         name='c:function',
         arguments=[usage],
         options={},
@@ -172,7 +400,7 @@ def _render_memberdef_define(node, directive):
     usage = '{name}'.format(
         name=node.xpath("./name/text()")[0],
         )
-    directive = sphinx.domains.c.CDomain.directives['macro'](
+    directive = c_domain().directives['macro'](
         name='c:macro',
         arguments=[usage],
         options={},
@@ -208,7 +436,7 @@ def _render_memberdef_typedef(node, directive):
     usage = '{name}'.format(
         name=node.xpath("./name/text()")[0],
         )
-    directive = sphinx.domains.c.CDomain.directives['type'](
+    directive = c_domain().directives['type'](
         name='c:type',
         arguments=[usage],
         options={},
@@ -248,7 +476,7 @@ def _render_memberdef_variable(node, directive):
         type=node.xpath("./type/text()")[0],
         name=node.xpath("./name/text()")[0],
         )
-    directive = sphinx.domains.c.CDomain.directives['member'](
+    directive = c_domain().directives['member'](
         name='c:member',
         arguments=[usage],
         options={},
@@ -275,6 +503,11 @@ def _render_memberdef_variable(node, directive):
 
 
 def render_memberdef(node, directive):
+    env = directive.state.document.settings.env
+    budget = env.temp_data.get('asphyxiate:budget')
+    if budget is not None:
+        budget.charge_member()
+
     kind = node.get('kind')
     fn = globals().get('_render_{name}_{kind}'.format(
             name=node.tag,
@@ -302,12 +535,54 @@ def render_sectiondef(node, directive):
     sec = docutils.nodes.section(ids=[kind])
     sec.append(docutils.nodes.title(text=title))
 
+    env = directive.state.document.settings.env
+    if env.temp_data.get('asphyxiate:summary'):
+        sec.append(render_sectiondef_summary(node, directive))
+        return [sec]
+
     for child in node.xpath("./*[not(self::location)]"):
         for item in render(child, directive):
             sec.append(item)
     return [sec]
 
 
+def render_sectiondef_summary(node, directive):
+    """Render the members of a sectiondef as one table."""
+    # only name, type, argsstring and briefdescription are looked at
+    env = directive.state.document.settings.env
+    budget = env.temp_data.get('asphyxiate:budget')
+    document = directive.state.document
+    rows = []
+    objects = []
+    for member in node.xpath("./memberdef"):
+        if budget is not None:
+            budget.charge_member()
+        name = member.xpath("string(./name)")
+        signature = ' '.join(part for part in [
+                member.xpath("normalize-space(./type)"),
+                name + member.xpath("normalize-space(./argsstring)"),
+                ] if part)
+        brief = member.xpath("normalize-space(./briefdescription)")
+
+        name_cell = [docutils.nodes.Text(name)]
+        objtype = INDEX_OBJTYPES.get(member.get('kind'))
+        if objtype is not None:
+            target = c_target(document, name)
+            if target is not None:
+                name_cell.insert(0, target)
+                objects.append((name, objtype))
+        rows.append([
+                name_cell,
+                [docutils.nodes.literal(signature, signature)],
+                [docutils.nodes.Text(brief)],
+                ])
+    note_inventory(env, objects)
+    return summary_table(
+        headers=['Name', 'Signature', 'Description'],
+        rows=rows,
+        )
+
+
 def _render_compounddef_file(node, directive):
     # TODO render compoundname, briefdescription, detaileddescription
     # listofallmembers seems to just duplicate the sectiondef>memberdef's
@@ -335,7 +610,7 @@ def _render_compounddef_struct(node, directive):
     usage = 'struct {name}'.format(
         name=node.xpath("./compoundname/text()")[0],
         )
-    directive = sphinx.domains.c.CDomain.directives['type'](
+    directive = c_domain().directives['type'](
         name='c:type',
         arguments=[usage],
         options={},
@@ -354,9 +629,11 @@ def _render_compounddef_struct(node, directive):
     for para in node.xpath("./briefdescription/*"):
         for p in render(para, directive):
             items[-1].children[-1].append(p)
-    for para in node.xpath("./detaileddescription/*"):
-        for p in render(para, directive):
-            items[-1].children[-1].append(p)
+    env = directive.state.document.settings.env
+    if not env.temp_data.get('asphyxiate:summary'):
+        for para in node.xpath("./detaileddescription/*"):
+            for p in render(para, directive):
+                items[-1].children[-1].append(p)
 
     sec.extend(items)
 
@@ -390,67 +667,123 @@ def render_compounddef(node, directive):
     return fn(node, directive)
 
 
-def render_compound(node, directive):
-    assert node.get('kind') in ['file'], \
-        "cannot handle {node.tag} kind={node.attrib[kind]}".format(node=node)
-
-    refid = node.attrib['refid']
+def _render_compound_refid(refid, directive):
     env = directive.state.document.settings.env
-    xml_path = env.config.asphyxiate_doxygen_xml
+    xml_path = project_xml_path(env, env.temp_data.get('asphyxiate:project'))
     path = os.path.join(
         xml_path,
         'xml',
         '{refid}.xml'.format(refid=refid),
         )
-    log.getChild('render_compound').debug('Parsing doxygen xml from %s', path)
-    xml = etree.parse(path)
+    budget = env.temp_data.get('asphyxiate:budget')
+    if budget is not None:
+        # charge before parsing, the point is to not load huge files
+        budget.charge_xml(os.path.getsize(path))
+    (xml, digest) = load_compound(path)
+    note_compound(env, path, digest)
     for node in xml.getroot():
         for item in render(node, directive):
             yield item
 
 
+def render_compound(node, directive):
+    assert node.get('kind') in ['file'], \
+        "cannot handle {node.tag} kind={node.attrib[kind]}".format(node=node)
+
+    return _render_compound_refid(node.attrib['refid'], directive)
+
+
 def render_innerclass(node, directive):
     # TODO skip if @prot != 'public' ?
-    refid = node.attrib['refid']
-    env = directive.state.document.settings.env
-    xml_path = env.config.asphyxiate_doxygen_xml
-    path = os.path.join(
-        xml_path,
-        'xml',
-        '{refid}.xml'.format(refid=refid),
-        )
-    log.getChild('render_innerclass').debug(
-        'Parsing doxygen xml from %s', path,
-        )
-    xml = etree.parse(path)
-    for node in xml.getroot():
-        for item in render(node, directive):
-            yield item
+    return _render_compound_refid(node.attrib['refid'], directive)
+
+
+def _is_inline(node):
+    return node is not None and node.tag in INLINE_TAGS
+
+
+def _para_text(text, before, after):
+    """Trim para text between elements ``before`` and ``after``."""
+    # whitespace next to inline markup is a word break, elsewhere it
+    # is just xml formatting
+    stripped = text.strip()
+    if not stripped:
+        if _is_inline(before) and _is_inline(after) and text:
+            return ' '
+        return ''
+    if _is_inline(before) and text[:1].isspace():
+        stripped = ' ' + stripped
+    if _is_inline(after) and text[-1:].isspace():
+        stripped = stripped + ' '
+    return stripped
 
 
 def render_para(node, directive):
     p = docutils.nodes.paragraph()
     if node.text is not None:
-        # TODO this isn't always safe.. how do i know when it's safe?
-        # basically, <para>foo <itemizedlist>... should eat the
-        # whitespace, <para>foo <em>blah</em> should not? does doxygen
-        # even have inline markup? try to go with the heuristic of
-        # eating whitespace before a closing tag, defer the rest until
-        # it's actually a problem.
-        text = node.text
-        if len(node) == 0:
-            text = text.strip()
-        p.append(docutils.nodes.Text(text))
+        first = node[0] if len(node) else None
+        text = _para_text(node.text, before=None, after=first)
+        if text:
+            p.append(docutils.nodes.Text(text))
     for child in node:
         for item in render(child, directive):
             p.append(item)
         if child.tail is not None:
-            tail = child.tail.strip()
+            tail = _para_text(child.tail, before=child, after=child.getnext())
             if tail:
                 p.append(docutils.nodes.Text(tail))
     return [p]
 
 
+def _render_inline(inline, node, directive):
+    if node.text is not None:
+        inline.append(docutils.nodes.Text(node.text))
+    for child in node:
+        for item in render(child, directive):
+            inline.append(item)
+        if child.tail is not None:
+            inline.append(docutils.nodes.Text(child.tail))
+    return [inline]
+
+
+def render_bold(node, directive):
+    return _render_inline(docutils.nodes.strong(), node, directive)
+
+
+def render_emphasis(node, directive):
+    return _render_inline(docutils.nodes.emphasis(), node, directive)
+
+
+def render_computeroutput(node, directive):
+    # refs inside inline code would just fight the literal styling
+    text = ''.join(node.itertext())
+    return [docutils.nodes.literal(text, text)]
+
+
+def render_ulink(node, directive):
+    ref = docutils.nodes.reference(refuri=node.get('url'))
+    return _render_inline(ref, node, directive)
+
+
+def _code_text(node):
+    parts = [node.text or '']
+    for child in node:
+        if child.tag == 'sp':
+            parts.append(' ')
+        else:
+            parts.append(_code_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+def render_programlisting(node, directive):
+    text = '\n'.join(
+        _code_text(codeline)
+        for codeline in node.xpath("./codeline")
+        )
+    return [docutils.nodes.literal_block(text, text)]
+
+
 def render_itemizedlist(node, directive):
     l = docutils.nodes.bullet_list()
     assert node.text is None or node.text.strip() == ''
@@ -481,16 +814,30 @@ def render_ref(node, directive):
         "cannot handle {node.tag} kind={node.attrib[kindref]}".format(node=node)
 
     usage = node.xpath("./text()")[0]
-    items, _ = sphinx.domains.c.CDomain.roles[role](
-        typ='{name}:{role}'.format(name=sphinx.domains.c.CDomain.name, role=role),
+    return xref(role, usage, directive)
+
+
+def xref(role, text, directive):
+    items, _ = c_domain().roles[role](
+        typ='{name}:{role}'.format(name=c_domain().name, role=role),
         rawtext='',
-        text=usage,
+        text=text,
         lineno=directive.lineno,
         inliner=directive.state_machine,
         )
     return items
 
 
+def c_target(document, name):
+    """Anchor ``name`` like the C domain does, None if already there."""
+    targetname = 'c.' + name
+    if targetname in document.ids:
+        return None
+    target = docutils.nodes.target('', '', ids=[targetname], names=[targetname])
+    document.note_explicit_target(target)
+    return target
+
+
 def _render_simplesect_warning(node, directive):
     w = docutils.nodes.warning()
     for n in node:
@@ -560,47 +907,345 @@ def render(node, directive):
                                  node.base, node.sourceline)
     fn = globals().get('render_{name}'.format(name=node.tag))
     if fn is None:
+        # warn once per tag and build, count the rest for the summary
+        # in report_unsupported
+        env = directive.state.document.settings.env
+        if not hasattr(env, 'asphyxiate_unsupported'):
+            env.asphyxiate_unsupported = {}
+        seen = env.asphyxiate_unsupported.get(node.tag, 0)
+        env.asphyxiate_unsupported[node.tag] = seen + 1
+
         warning = 'asphyxiate: {msg} {tag!r}'.format(
             msg='No renderer found for doxygen tag',
             tag=node.tag,
             )
-        yield docutils.nodes.warning(
-            "",
-            docutils.nodes.paragraph("", "", docutils.nodes.Text(warning)),
-            docutils.nodes.literal_block(text=etree.tostring(node, pretty_print=True).rstrip()),
-            )
-        yield directive.state.document.reporter.warning(
-            warning,
-            line=directive.lineno,
-            )
+        if env.config.asphyxiate_show_unsupported:
+            from lxml import etree
+            yield docutils.nodes.warning(
+                "",
+                docutils.nodes.paragraph("", "", docutils.nodes.Text(warning)),
+                docutils.nodes.literal_block(text=etree.tostring(node, pretty_print=True).rstrip()),
+                )
+        if not seen:
+            yield directive.state.document.reporter.warning(
+                warning,
+                line=directive.lineno,
+                )
     else:
         for item in fn(node, directive):
             yield item
 
 
+def project_xml_path(env, project=None):
+    """Find the doxygen output directory for ``project``."""
+    # a single directory, or a dict of project names to directories
+    xml_path = env.config.asphyxiate_doxygen_xml
+    if xml_path is None:
+        raise AsphyxiateError(
+            'missing config setting asphyxiate_doxygen_xml')
+
+    if not isinstance(xml_path, dict):
+        if project is not None:
+            raise AsphyxiateError(
+                'doxygen project {project!r} given, but '
+                'asphyxiate_doxygen_xml is not a dict of projects'.format(
+                    project=project,
+                    ))
+        return xml_path
+
+    if project is None:
+        if len(xml_path) != 1:
+            raise AsphyxiateError(
+                'asphyxiate_doxygen_xml has several projects, '
+                'pick one with :project:')
+        (project,) = xml_path.keys()
+    if project not in xml_path:
+        raise AsphyxiateError(
+            'unknown doxygen project {project!r}'.format(
+                project=project,
+                ))
+    return xml_path[project]
+
+
+def load_index(env, project=None):
+    xml_path = project_xml_path(env, project)
+    path = os.path.join(xml_path, 'xml', 'index.xml')
+    (index_xml, digest) = load_compound(path)
+    return (path, index_xml, digest)
+
+
+def summary_table(headers, rows, title=None):
+    """Build a table from header strings and rows of inline node lists."""
+    table = docutils.nodes.table(classes=['asphyxiate-summary'])
+    if title is not None:
+        table.append(docutils.nodes.title(text=title))
+    tgroup = docutils.nodes.tgroup(cols=len(headers))
+    table.append(tgroup)
+    for _ in headers:
+        tgroup.append(docutils.nodes.colspec(colwidth=1))
+
+    def make_row(cells):
+        row = docutils.nodes.row()
+        for cell in cells:
+            entry = docutils.nodes.entry()
+            entry.append(docutils.nodes.paragraph('', '', *cell))
+            row.append(entry)
+        return row
+
+    thead = docutils.nodes.thead()
+    thead.append(make_row([[docutils.nodes.Text(h)] for h in headers]))
+    tgroup.append(thead)
+    tbody = docutils.nodes.tbody()
+    for cells in rows:
+        tbody.append(make_row(cells))
+    tgroup.append(tbody)
+    return table
+
+
+def render_index_summary(compound, directive):
+    """Summarize a file compound from the doxygen index alone."""
+    env = directive.state.document.settings.env
+    rows = []
+    objects = []
+    for member in compound.xpath("./member"):
+        kind = member.get('kind')
+        (name,) = member.xpath("./name/text()")
+        name_cell = [docutils.nodes.Text(name)]
+        objtype = INDEX_OBJTYPES.get(kind)
+        if objtype is not None:
+            target = c_target(directive.state.document, name)
+            if target is not None:
+                name_cell.insert(0, target)
+                objects.append((name, objtype))
+        rows.append([name_cell, [docutils.nodes.Text(kind)]])
+    note_inventory(env, objects)
+    (filename,) = compound.xpath("./name/text()")
+    return [summary_table(
+            headers=['Name', 'Kind'],
+            rows=rows,
+            title=filename,
+            )]
+
+
 class AsphyxiateFileDirective(docutils.parsers.rst.Directive):
 
     required_arguments = 1
+    option_spec = {
+        'project': docutils.parsers.rst.directives.unchanged_required,
+        'summary': docutils.parsers.rst.directives.flag,
+        'time-limit': float,
+        'member-limit': docutils.parsers.rst.directives.nonnegative_int,
+        'xml-limit': docutils.parsers.rst.directives.nonnegative_int,
+        }
 
     @listify
     def run(self):
         (filename,) = self.arguments
 
         env = self.state.document.settings.env
-        xml_path = env.config.asphyxiate_doxygen_xml
-        if xml_path is None:
-            raise AsphyxiateError(
-                'missing config setting asphyxiate_doxygen_xml')
+        init_logging(env)
+        project = self.options.get('project')
+        (path, index_xml, digest) = load_index(env, project)
+        compounds = find_file(index_xml, filename)
+        note_lookup(env, path, digest, filename, compounds)
+
+        budget = Budget(
+            time_limit=self.options.get(
+                'time-limit', env.config.asphyxiate_time_limit),
+            member_limit=self.options.get(
+                'member-limit', env.config.asphyxiate_member_limit),
+            xml_limit=self.options.get(
+                'xml-limit', env.config.asphyxiate_xml_limit),
+            )
+        # remember what the page had, to roll back a partial render
+        document = self.state.document
+        objects = env.domaindata['c']['objects']
+        known_objects = set(objects)
+        known_ids = set(document.ids)
+        known_names = set(document.nameids)
+        inventory = getattr(env, 'asphyxiate_inventory', {})
+        known_inventory = len(inventory.get(env.docname, []))
+        env.temp_data['asphyxiate:budget'] = budget
+        env.temp_data['asphyxiate:summary'] = 'summary' in self.options
+        env.temp_data['asphyxiate:project'] = project
+        try:
+            items = []
+            for node in compounds:
+                items.extend(render(node, self))
+        except BudgetExceeded as e:
+            log.warning('%s: %s, rendering a summary instead', filename, e)
+            # the partial output is thrown away, so are the objects
+            # and anchors it described
+            for name in set(objects) - known_objects:
+                if objects[name][0] == env.docname:
+                    del objects[name]
+            for id_ in set(document.ids) - known_ids:
+                del document.ids[id_]
+            for name in set(document.nameids) - known_names:
+                del document.nameids[name]
+                document.nametypes.pop(name, None)
+            inventory = getattr(env, 'asphyxiate_inventory', {})
+            if env.docname in inventory:
+                del inventory[env.docname][known_inventory:]
+            items = []
+            if isinstance(e, XMLBudgetExceeded):
+                # all there is without loading the compounds
+                for node in compounds:
+                    items.extend(render_index_summary(node, self))
+            else:
+                # the compounds are parsed and in the tree cache by
+                # now, summarize them with their signatures
+                env.temp_data['asphyxiate:budget'] = None
+                env.temp_data['asphyxiate:summary'] = True
+                for node in compounds:
+                    items.extend(render(node, self))
+        finally:
+            del env.temp_data['asphyxiate:budget']
+            del env.temp_data['asphyxiate:summary']
+            del env.temp_data['asphyxiate:project']
+        return items
+
+
+class AsphyxiateIndexDirective(docutils.parsers.rst.Directive):
+    """Anchor every doxygen index member and offer it to the C domain."""
+
+    option_spec = {
+        'project': docutils.parsers.rst.directives.unchanged_required,
+        }
+
+    @listify
+    def run(self):
+        env = self.state.document.settings.env
+        init_logging(env)
+        project = self.options.get('project')
+        (path, index_xml, digest) = load_index(env, project)
+        note_compound(env, path, digest)
 
-        path = os.path.join(xml_path, 'xml', 'index.xml')
-        log.debug('Parsing xml: %s', path)
-        index_xml = etree.parse(path)
+        seen = set()
+        objects = []
         for node in index_xml.xpath(
-            "//compound[@kind='file' and name=$name]",
-            name=filename,
+            "/*/compound[@kind='struct'] | /*/compound/member",
             ):
-            for item in render(node, self):
-                yield item
+            objtype = INDEX_OBJTYPES.get(node.get('kind'))
+            if objtype is None:
+                continue
+            (name,) = node.xpath("./name/text()")
+            if name in seen:
+                continue
+            seen.add(name)
+            objects.append((name, objtype))
+
+        note_inventory(env, objects)
+
+        for (name, objtype) in objects:
+            target = c_target(self.state.document, name)
+            if target is not None:
+                yield target
+
+
+def purge_doc(app, env, docname):
+    if hasattr(env, 'asphyxiate_compounds'):
+        env.asphyxiate_compounds.pop(docname, None)
+    if hasattr(env, 'asphyxiate_lookups'):
+        env.asphyxiate_lookups.pop(docname, None)
+    if hasattr(env, 'asphyxiate_inventory'):
+        env.asphyxiate_inventory.pop(docname, None)
+
+
+def outdated_compounds(app, env, added, changed, removed):
+    """Find documents whose doxygen compounds changed in content."""
+    compounds = getattr(env, 'asphyxiate_compounds', {})
+    lookups = getattr(env, 'asphyxiate_lookups', {})
+    if not compounds and not lookups:
+        return []
+    init_logging(env)
+    outdated = []
+    for docname in sorted(set(compounds) | set(lookups)):
+        if docname in added or docname in changed or docname in removed:
+            continue
+        if (_compounds_changed(compounds.get(docname, {}))
+            or _lookups_changed(lookups.get(docname, {}))):
+            log.getChild('outdated_compounds').debug(
+                'Doxygen xml changed for %s', docname,
+                )
+            outdated.append(docname)
+    return outdated
+
+
+def _compounds_changed(compounds):
+    from lxml import etree
+    for path, digest in compounds.items():
+        try:
+            (tree, current) = compound_digest(path)
+        except (EnvironmentError, etree.XMLSyntaxError):
+            # gone or broken, let the rebuild report it
+            return True
+        if current != digest:
+            if tree is not None:
+                # about to be rendered again, don't parse twice
+                _tree_cache[path] = (_stat(path), tree)
+            return True
+    return False
+
+
+def _lookups_changed(lookups):
+    from lxml import etree
+    for (path, filename), (digest, found) in lookups.items():
+        try:
+            (_, current) = compound_digest(path)
+            if current == digest:
+                continue
+            (index_xml, current) = load_compound(path)
+        except (EnvironmentError, etree.XMLSyntaxError):
+            return True
+        if _found_digest(find_file(index_xml, filename)) != found:
+            return True
+        # the index changed elsewhere; no need to look again next time
+        lookups[(path, filename)] = (current, found)
+    return False
+
+
+def drop_trees(app, env):
+    """Forget the parsed xml once all documents are read."""
+    _tree_cache.clear()
+
+
+def withdraw_inventory(app, env, added, changed, removed):
+    """Take the index objects out of the C domain before reading."""
+    # otherwise rendering one in full would look like a duplicate
+    registered = getattr(env, 'asphyxiate_registered', {})
+    objects = env.domaindata['c']['objects']
+    for name, docname in registered.items():
+        if objects.get(name, (None,))[0] == docname:
+            del objects[name]
+    env.asphyxiate_registered = {}
+    return []
+
+
+def register_inventory(app, env):
+    """Register the index objects nothing else described."""
+    inventory = getattr(env, 'asphyxiate_inventory', {})
+    objects = env.domaindata['c']['objects']
+    registered = {}
+    for docname in sorted(inventory):
+        for (name, objtype) in inventory[docname]:
+            if name in objects:
+                continue
+            objects[name] = (docname, objtype)
+            registered[name] = docname
+    env.asphyxiate_registered = registered
+
+
+def report_unsupported(app, env):
+    counts = getattr(env, 'asphyxiate_unsupported', {})
+    env.asphyxiate_unsupported = {}
+    if counts:
+        app.info('asphyxiate: unsupported doxygen tags: {tags}'.format(
+                tags=', '.join(
+                    '{tag} ({count})'.format(tag=tag, count=counts[tag])
+                    for tag in sorted(counts)
+                    ),
+                ))
 
 
 def setup(app):
@@ -610,19 +1255,28 @@ def setup(app):
         # to keep its.. nose.. out of other people's business
         return
 
-    # sphinx isn't helpful for extensions wanting to log, so bypass it and
-    # go straight to stderr
-    log.propagate = False
-    handler = logging.StreamHandler()
-    handler.setFormatter(
-        logging.Formatter(fmt='%(name)s:%(levelname)s: %(message)s'),
-        )
-    log.addHandler(handler)
-    log.setLevel(logging.DEBUG)  # TODO take this from configuration
-
     app.add_directive(
         "doxygenfile",
         AsphyxiateFileDirective,
         )
+    app.add_directive(
+        "doxygenindex",
+        AsphyxiateIndexDirective,
+        )
 
     app.add_config_value('asphyxiate_doxygen_xml', None, 'html')
+    app.add_config_value('asphyxiate_log_level', 'WARNING', '')
+    # defaults for the doxygenfile :time-limit:, :member-limit: and
+    # :xml-limit: options, past which only a summary is rendered
+    app.add_config_value('asphyxiate_time_limit', None, 'env')
+    app.add_config_value('asphyxiate_member_limit', None, 'env')
+    app.add_config_value('asphyxiate_xml_limit', None, 'env')
+    # include the xml of tags with no renderer in the output
+    app.add_config_value('asphyxiate_show_unsupported', True, 'env')
+
+    app.connect('env-purge-doc', purge_doc)
+    app.connect('env-get-outdated', outdated_compounds)
+    app.connect('env-get-outdated', withdraw_inventory)
+    app.connect('env-updated', drop_trees)
+    app.connect('env-updated', register_inventory)
+    app.connect('env-updated', report_unsupported)
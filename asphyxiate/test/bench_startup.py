@@ -0,0 +1,96 @@
+"""
+Startup cost of the extension.
+
+Times ``import asphyxiate`` on its own, and a ``sphinx-build`` of a
+project with no doxygen directives, with and without asphyxiate
+enabled. Run with ``python -m asphyxiate.test.bench_startup``.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+REPEAT = 5
+
+
+def best_of(args, env=None):
+    best = None
+    with file(os.devnull, 'w') as devnull:
+        for _ in xrange(REPEAT):
+            start = time.time()
+            subprocess.check_call(
+                args=args,
+                env=env,
+                stdout=devnull,
+                stderr=devnull,
+                )
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+    return best
+
+
+def sphinx_build(tmp, extensions):
+    conf = os.path.join(tmp, 'conf')
+    src = os.path.join(tmp, 'src')
+    html = os.path.join(tmp, 'html')
+    for path in [conf, src]:
+        if not os.path.isdir(path):
+            os.mkdir(path)
+    with file(os.path.join(conf, 'conf.py'), 'w') as f:
+        f.write("""
+extensions = {extensions!r}
+""".format(
+                extensions=extensions,
+                ))
+    with file(os.path.join(src, 'contents.rst'), 'w') as f:
+        f.write("""
+==========
+ Contents
+==========
+
+Nothing to see here.
+""")
+
+    env = {}
+    env.update(os.environ)
+    env['PATH'] = os.path.dirname(sys.executable) + ':' + env['PATH']
+    return best_of(
+        args=[
+            'sphinx-build',
+            # fresh environment every time, this is about startup
+            '-E',
+            '-b', 'html',
+            '-c', conf,
+            src,
+            html,
+            ],
+        env=env,
+        )
+
+
+def main():
+    results = [
+        ('python', best_of([sys.executable, '-c', 'pass'])),
+        ('import asphyxiate',
+         best_of([sys.executable, '-c', 'import asphyxiate'])),
+        ]
+    tmp = tempfile.mkdtemp(prefix='asphyxiate-bench.')
+    try:
+        results.append(('sphinx-build', sphinx_build(tmp, [])))
+        results.append((
+                'sphinx-build with asphyxiate',
+                sphinx_build(tmp, ['asphyxiate']),
+                ))
+    finally:
+        shutil.rmtree(tmp)
+
+    for (name, seconds) in results:
+        print '{name:30} {ms:8.1f} ms'.format(name=name, ms=seconds * 1000)
+
+
+if __name__ == '__main__':
+    main()
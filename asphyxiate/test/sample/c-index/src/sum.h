@@ -0,0 +1,6 @@
+/** @file */
+
+/**
+ * Sum two numbers.
+ */
+int sum(int a, int b);
@@ -0,0 +1,7 @@
+/**
+ * Sum two numbers.
+ *
+ * Adds \b two numbers, \e exactly. Never returns \c NULL. See
+ * <a href="http://example.com/">the docs</a> for more.
+ */
+int sum(int a, int b);
@@ -0,0 +1,11 @@
+/**
+ * Sum two numbers.
+ *
+ * This detailed description is left out of the summary.
+ */
+int sum(int a, int b);
+
+/**
+ * Subtract two numbers.
+ */
+int subtract(int a, int b);
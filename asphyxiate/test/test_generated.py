@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import lxml.html
+
+from .util import doxygen, sphinx_harness
+
+
+def _generate(path, count, options):
+    src = os.path.join(path, 'src')
+    os.mkdir(src)
+    with file(os.path.join(src, 'gen.h'), 'w') as f:
+        f.write('/** @file */\n')
+        for i in xrange(count):
+            f.write("""
+/**
+ * Generated function number {i}.
+ */
+int gen_{i}(int a, int b);
+""".format(i=i))
+
+    rst = os.path.join(path, 'rst')
+    os.mkdir(rst)
+    with file(os.path.join(rst, 'contents.rst'), 'w') as f:
+        f.write("""
+===========
+ Generated
+===========
+
+.. doxygenfile:: gen.h
+{options}
+""".format(
+                options=''.join('   {0}\n'.format(o) for o in options),
+                ))
+
+
+def _test_generated(count, options, project=None, config={},
+                    fallback=False):
+    path = tempfile.mkdtemp(prefix='asphyxiate-test-generated.')
+    try:
+        _generate(path, count, options)
+        xml = os.path.join(path, 'xml')
+        os.mkdir(xml)
+        doxygen(src=os.path.join(path, 'src'), xml=xml)
+        if project is not None:
+            # the other project does not exist, it must not be loaded
+            xml = {
+                project: xml,
+                'other': os.path.join(path, 'nonexistent'),
+                }
+        html = sphinx_harness().build(
+            name='generated',
+            path=path,
+            xml=xml,
+            docname='rst/contents',
+            config=config,
+            )
+
+        # full and summary rendering both anchor members the way the
+        # C domain links to them
+        doc = lxml.html.parse(html)
+        for i in xrange(count):
+            id_ = 'c.gen_{i}'.format(i=i)
+            assert doc.xpath('//*[@id=$id]', id=id_), \
+                'no anchor {id}'.format(id=id_)
+
+        if fallback:
+            # the partial full render was dropped for a summary table;
+            # duplicate anchors or objects would have failed the build
+            assert doc.xpath(
+                "//table[contains(concat(' ', @class, ' '),"
+                " ' asphyxiate-summary ')]",
+                ), 'no summary table'
+            assert not doc.xpath("//dl"), 'partial render left behind'
+    finally:
+        shutil.rmtree(path)
+
+
+def test_generated():
+    for count in [1, 100, 1000]:
+        for options in [[], [':summary:']]:
+            yield (_test_generated, count, options)
+
+
+def test_project():
+    for options in [[], [':summary:']]:
+        yield (_test_generated, 10, [':project: gen'] + options, 'gen')
+
+
+def test_limits():
+    for mode in [[], [':summary:']]:
+        for limit in [
+            ':member-limit: 10',
+            ':xml-limit: 100',
+            ':time-limit: 0',
+            ]:
+            yield (_test_generated, 100, mode + [limit], None, {}, True)
+        for config in [
+            dict(asphyxiate_member_limit=10),
+            dict(asphyxiate_xml_limit=100),
+            dict(asphyxiate_time_limit=0),
+            ]:
+            yield (_test_generated, 100, mode, None, config, True)
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+
+from .util import doxygen, sphinx_harness
+
+
+HEADER = """
+{padding}
+/**
+ * {brief}
+ */
+int sum(int a, int b);
+"""
+
+
+def _write_header(path, brief, padding=0):
+    with file(os.path.join(path, 'src', 'sum.h'), 'w') as f:
+        f.write(HEADER.format(brief=brief, padding='\n' * padding))
+
+
+def _build(path):
+    xml = os.path.join(path, 'xml')
+    doxygen(src=os.path.join(path, 'src'), xml=xml)
+    harness = sphinx_harness()
+    harness.build(
+        name='outdated',
+        path=path,
+        xml=xml,
+        docname='rst/contents',
+        )
+    return harness.read
+
+
+def test_outdated():
+    path = tempfile.mkdtemp(prefix='asphyxiate-test-outdated.')
+    try:
+        for d in ['src', 'rst', 'xml']:
+            os.mkdir(os.path.join(path, d))
+        with file(os.path.join(path, 'rst', 'contents.rst'), 'w') as f:
+            f.write("""
+========
+ Sum
+========
+
+.. doxygenfile:: sum.h
+
+.. doxygenfile:: other.h
+""")
+        _write_header(path, brief='Sum two numbers.')
+        assert 'outdated/rst/contents' in _build(path)
+
+        # doxygen rewrites every file, with new line numbers, but the
+        # documentation is the same
+        _write_header(path, brief='Sum two numbers.', padding=5)
+        assert 'outdated/rst/contents' not in _build(path)
+
+        _write_header(path, brief='Add two numbers.', padding=5)
+        assert 'outdated/rst/contents' in _build(path)
+
+        # other.h was not found so far, but now it is
+        with file(os.path.join(path, 'src', 'other.h'), 'w') as f:
+            f.write("""
+/**
+ * Subtract two numbers.
+ */
+int subtract(int a, int b);
+""")
+        assert 'outdated/rst/contents' in _build(path)
+    finally:
+        shutil.rmtree(path)
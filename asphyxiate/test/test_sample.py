@@ -4,7 +4,7 @@ import lxml.html
 
 from nose.tools import eq_ as eq
 
-from .util import doxygen, sphinx
+from .util import doxygen, sphinx_harness
 
 
 def _test_sample(name, path):
@@ -14,22 +14,35 @@ def _test_sample(name, path):
         shutil.rmtree(xml)
     os.mkdir(xml)
     doxygen(src=src, xml=xml)
-    rst = os.path.join(path, 'rst')
-    sphinxtmp = os.path.join(path, 'sphinxtmp')
-    if os.path.isdir(sphinxtmp):
-        shutil.rmtree(sphinxtmp)
-    os.mkdir(sphinxtmp)
-    html = os.path.join(path, 'html')
-    if os.path.isdir(html):
-        shutil.rmtree(html)
-    os.mkdir(html)
-    sphinx(rst=rst, xml=xml, tmp=sphinxtmp, html=html)
-
-    doc = lxml.html.parse(os.path.join(html, 'contents.html'))
+    html = sphinx_harness().build(
+        name=name,
+        path=path,
+        xml=xml,
+        docname='rst/contents',
+        )
+
+    doc = lxml.html.parse(html)
     got = doc.xpath("id('got')/*")
     want = doc.xpath("id('want')/*")
     have_want = bool(want)
 
+    # links within the page have to land somewhere; the id and href
+    # stripping below would hide that
+    for link in doc.xpath("//a[starts-with(@href, '#')]"):
+        fragment = link.get('href')[1:]
+        if fragment:
+            assert doc.xpath("//*[@id=$id]", id=fragment), \
+                'dangling link to #{fragment}'.format(fragment=fragment)
+
+    # links the Got section must contain, for when the text alone would
+    # look the same whether or not they resolved
+    links = os.path.join(path, 'links')
+    if os.path.exists(links):
+        with file(links) as f:
+            for href in f.read().split():
+                assert doc.xpath("id('got')//a[@href=$href]", href=href), \
+                    'no link to {href}'.format(href=href)
+
     assert got[0].tag == 'h1'
     del got[0]
     if have_want:
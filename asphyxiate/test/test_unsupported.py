@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import lxml.html
+
+from nose.tools import eq_ as eq
+
+from .util import doxygen, sphinx_harness
+
+
+HEADER = """
+/**
+ * Sum two numbers.
+ *
+ * @code
+ * int x = sum(1, 2);
+ * @endcode
+ *
+ * \\verbatim
+ raw one
+ \\endverbatim
+ *
+ * @code
+ * int y = sum(x, 3);
+ * @endcode
+ *
+ * \\verbatim
+ raw two
+ \\endverbatim
+ */
+int sum(int a, int b);
+"""
+
+
+def _test_unsupported(show):
+    path = tempfile.mkdtemp(prefix='asphyxiate-test-unsupported.')
+    try:
+        for d in ['src', 'rst', 'xml']:
+            os.mkdir(os.path.join(path, d))
+        with file(os.path.join(path, 'src', 'sum.h'), 'w') as f:
+            f.write(HEADER)
+        with file(os.path.join(path, 'rst', 'contents.rst'), 'w') as f:
+            f.write("""
+=====
+ Sum
+=====
+
+.. doxygenfile:: sum.h
+""")
+        xml = os.path.join(path, 'xml')
+        doxygen(src=os.path.join(path, 'src'), xml=xml)
+        harness = sphinx_harness()
+        html = harness.build(
+            # a fresh docname, so the setting is seen on every read
+            name='unsupported-{show}'.format(show=show),
+            path=path,
+            xml=xml,
+            docname='rst/contents',
+            config=dict(asphyxiate_show_unsupported=show),
+            warnings=True,
+            )
+
+        # warned about once, counted twice
+        eq(len(harness.warning.warnings), 1)
+        assert "'verbatim'" in harness.warning.warnings[0]
+        assert 'verbatim (2)' in harness.status.getvalue()
+
+        doc = lxml.html.parse(html)
+        code = [
+            ''.join(pre.itertext()).strip()
+            for pre in doc.xpath("//pre")
+            ]
+        assert 'int x = sum(1, 2);' in code
+        assert 'int y = sum(x, 3);' in code
+
+        dumps = doc.xpath(
+            "//div[contains(concat(' ', @class, ' '), ' warning ')]",
+            )
+        eq(len(dumps), 2 if show else 0)
+        text = ''.join(doc.getroot().itertext())
+        eq('raw one' in text, show)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_unsupported():
+    for show in [True, False]:
+        yield (_test_unsupported, show)
@@ -1,6 +1,11 @@
+import atexit
 import os
+import shutil
+import sphinx.application
 import subprocess
-import sys
+import tempfile
+
+from StringIO import StringIO
 
 
 def doxygen(src, xml):
@@ -45,45 +50,107 @@ JAVADOC_AUTOBRIEF = YES
         raise RuntimeError('Doxygen failed: %r' % p.returncode)
 
 
-def sphinx(rst, xml, tmp, html):
-    with file(os.path.join(tmp, 'conf.py'), 'w') as f:
-        f.write("""
+class WarningList(object):
+    """File-like object collecting each Sphinx warning as an item."""
+
+    def __init__(self):
+        self.warnings = []
+
+    def write(self, text):
+        text = text.strip()
+        if text:
+            self.warnings.append(text)
+
+
+class SphinxHarness(object):
+    """
+    A single in-process Sphinx application, reused for every build.
+
+    Each build replaces the previous source tree, so the environment
+    purges everything the previous build described.
+    """
+
+    def __init__(self, tmp):
+        self.srcdir = os.path.join(tmp, 'src')
+        self.outdir = os.path.join(tmp, 'html')
+        doctreedir = os.path.join(tmp, 'doctrees')
+        for path in [self.srcdir, self.outdir, doctreedir]:
+            os.mkdir(path)
+        with file(os.path.join(tmp, 'conf.py'), 'w') as f:
+            f.write("""
 extensions = ['asphyxiate']
-asphyxiate_doxygen_xml = {xml!r}
-""".format(
-                xml=xml,
-                ))
+""")
+        self.warning = WarningList()
+        self.status = StringIO()
+        self.app = sphinx.application.Sphinx(
+            srcdir=self.srcdir,
+            confdir=tmp,
+            outdir=self.outdir,
+            doctreedir=doctreedir,
+            buildername='html',
+            status=self.status,
+            warning=self.warning,
+            freshenv=True,
+            )
+        # docnames read by the last build
+        self.read = []
+        self.app.connect('doctree-read', self._doctree_read)
 
-    env = {}
-    env.update(os.environ)
-    env['PATH'] = os.path.dirname(sys.executable) + ':' + env['PATH']
-    p = subprocess.Popen(
-        args=[
-            'sphinx-build',
-            '-a',
-            '-b', 'html',
-            '-c', tmp,
-            rst,
-            html,
-            ],
-        env=env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        )
-    (out, err) = p.communicate()
-    if out:
-        print '\n'.join('sphinx: ' + l for l in out.splitlines())
-    err = err.splitlines()
-    # don't fail if it's all debug logging
-    if (any(line.split(':', 1)[0].split('.', 1)[0] != 'asphyxiate'
-            for line in err)
-        or any(line.split(':', 2)[1] != 'DEBUG'
-               for line in err)):
-        raise RuntimeError(
-            'Sphinx gave warnings:\n'
-            + '\n'.join('  ' + l for l in err),
+    def _doctree_read(self, app, doctree):
+        self.read.append(app.env.docname)
+
+    def build(self, name, path, xml, docname, config={}, warnings=False):
+        """
+        Build ``docname`` from the sample directory ``path``.
+
+        The sample is copied under ``name`` so relative includes keep
+        working. ``config`` overrides settings for this build only.
+        Sphinx warnings fail the build unless ``warnings`` is true, in
+        which case they are left in ``self.warning.warnings``. Returns
+        the path of the generated html.
+        """
+        for old in os.listdir(self.srcdir):
+            shutil.rmtree(os.path.join(self.srcdir, old))
+        shutil.copytree(
+            path,
+            os.path.join(self.srcdir, name),
+            ignore=shutil.ignore_patterns('xml', 'html', 'sphinxtmp'),
             )
-    else:
-        print '\n'.join('sphinx stderr: ' + l for l in err)
-    if p.returncode != 0:
-        raise RuntimeError('Sphinx failed: %r' % p.returncode)
+        docname = '{name}/{docname}'.format(name=name, docname=docname)
+
+        self.app.config.master_doc = docname
+        self.app.config.asphyxiate_doxygen_xml = xml
+        del self.warning.warnings[:]
+        del self.read[:]
+        self.status.seek(0)
+        self.status.truncate()
+        saved = dict(
+            (key, getattr(self.app.config, key))
+            for key in config
+            )
+        for key, value in config.items():
+            setattr(self.app.config, key, value)
+        try:
+            self.app.build()
+        finally:
+            for key, value in saved.items():
+                setattr(self.app.config, key, value)
+        if self.warning.warnings and not warnings:
+            raise RuntimeError(
+                'Sphinx gave warnings:\n'
+                + '\n'.join('  ' + l for l in self.warning.warnings),
+                )
+        return os.path.join(self.outdir, docname + '.html')
+
+
+_harness = None
+
+
+def sphinx_harness():
+    """Return the shared Sphinx harness, creating it on first use."""
+    global _harness
+    if _harness is None:
+        tmp = tempfile.mkdtemp(prefix='asphyxiate-test.')
+        atexit.register(shutil.rmtree, tmp)
+        _harness = SphinxHarness(tmp)
+    return _harness
@@ -13,7 +13,7 @@ setup(
 
     install_requires=[
         'setuptools',
-        'Sphinx >=1.0.7',
+        'Sphinx >=1.1',
         'lxml >=2.3.2',
         ],
 